@@ -21,6 +21,9 @@ from tkinter import ttk, simpledialog
 import winreg
 import re
 
+import updater
+import rollover
+
 # Import centralized version
 try:
     from _version import __version__ as VERSION
@@ -82,6 +85,24 @@ class BingTrayApp:
         interval_minutes = self.config.get("check_interval_minutes", 720)
         self.check_interval = interval_minutes * 60 if interval_minutes > 0 else 0
         
+        # Rollover-aware prefetch state
+        self.smart_schedule = self.config.get("smart_schedule", True)
+        self.apply_at = rollover.normalize_apply_at(self.config.get("apply_at", rollover.APPLY_IMMEDIATE))
+        if self.apply_at != self.config.get("apply_at", self.apply_at):
+            log_msg(f"Invalid apply_at {self.config['apply_at']!r}, using {self.apply_at}", "error")
+        self.last_fullstartdate = None
+        self.next_rollover = None
+        self.next_fetch = 0
+        self.prewarmed = False
+        self.pending_image_path = None
+        self.pending_due = None
+        self.was_locked = False
+        if self.config.get("rollover_utc"):
+            try:
+                self.schedule_rollover(rollover.next_rollover_from_time(self.config["rollover_utc"]).timestamp())
+            except ValueError:
+                pass
+        
         log_msg(f"Initializing Bing Wallpaper App v{VERSION}")
         
         if not self.config.get("proxy_url"):
@@ -124,6 +145,15 @@ class BingTrayApp:
         except Exception as e:
             log_msg(f"Error setting interval: {e}", "error")
 
+    def toggle_smart_schedule(self, icon, item):
+        self.smart_schedule = not self.smart_schedule
+        log_msg(f"Smart schedule {'enabled' if self.smart_schedule else 'disabled'}")
+        self.config["smart_schedule"] = self.smart_schedule
+        self.save_config()
+        self.last_check = time.time()
+        if self.icon:
+            self.icon.menu = self.create_menu()
+
     def show_custom_interval_dialog(self):
         """Show dialog to input custom interval in minutes"""
         if not self.root:
@@ -203,7 +233,8 @@ class BingTrayApp:
             data = resp.json()
             if not data.get("images"): return None
             img_data = data["images"][0]
-            return ("https://www.bing.com" + img_data["url"], img_data["startdate"])
+            return ("https://www.bing.com" + img_data["url"], img_data["startdate"],
+                    img_data.get("fullstartdate"), img_data.get("enddate"))
         except Exception as e:
             log_msg(f"API Fetch Error: {e}", "error")
             return None
@@ -251,6 +282,14 @@ class BingTrayApp:
         except Exception as e:
             log_msg(f"Wallpaper Set Error: {e}", "error")
 
+    def get_current_wallpaper(self):
+        try:
+            buf = ctypes.create_unicode_buffer(260)
+            ctypes.windll.user32.SystemParametersInfoW(0x73, len(buf), buf, 0)  # SPI_GETDESKWALLPAPER
+            return Path(buf.value) if buf.value else None
+        except Exception:
+            return None
+
     def update_tray_icon(self, image_path):
         if self.icon:
             try:
@@ -260,14 +299,120 @@ class BingTrayApp:
                     self.icon.icon = thumb
             except Exception: pass
 
-    def check_and_update(self, force=False):
+    # --- ROLLOVER-AWARE PREFETCH ---
+    def schedule_rollover(self, rollover_ts):
+        self.next_rollover = rollover_ts
+        self.schedule_fetch(rollover_ts + rollover.FETCH_DELAY)
+
+    def schedule_fetch(self, fetch_ts):
+        # Every scheduled fetch, retries included, gets its own prewarm
+        self.next_fetch = fetch_ts
+        self.prewarmed = False
+
+    def learn_rollover(self, fullstartdate, startdate, enddate):
+        # Remember the image even if its dates are unusable, so it isn't refetched
+        self.last_fullstartdate = fullstartdate
+        try:
+            next_ts = rollover.next_rollover(fullstartdate, startdate, enddate).timestamp()
+            learned = rollover.rollover_time(fullstartdate)
+        except (TypeError, ValueError):
+            log_msg(f"Cannot predict rollover from {fullstartdate}/{enddate}", "error")
+            return False
+        self.schedule_rollover(next_ts)
+        if self.config.get("rollover_utc") != learned:
+            log_msg(f"Learned Bing rollover time: {learned} UTC")
+            self.config["rollover_utc"] = learned
+            self.save_config()
+        return True
+
+    def prewarm_session(self):
+        # Resolve DNS and open the TLS connection so the pool reuses it for the fetch
+        self.prewarmed = True
+        try:
+            self.session.head("https://www.bing.com/", timeout=10, proxies=self.get_proxy_dict())
+        except Exception as e:
+            log_msg(f"Prewarm Error: {e}", "error")
+
+    def prefetch_next_image(self):
+        now = time.time()
+        self.last_check = now
+        info = self.get_bing_image_info()
+        path = None
+        scheduled = False
+        if info and info[2] and info[2] != self.last_fullstartdate:
+            url, date_str, fullstartdate, enddate = info
+            path = self.download_image(url, date_str)
+            if path:
+                scheduled = self.learn_rollover(fullstartdate, date_str, enddate)
+        # Not published yet, download failed or no usable dates: always move on
+        # (before queueing, so nothing below can leave next_fetch in the past)
+        if not scheduled:
+            self.schedule_fetch(now + rollover.retry_delay(self.next_rollover, now, self.check_interval))
+        if path:
+            self.queue_wallpaper(path)
+
+    def queue_wallpaper(self, path):
+        if path == self.current_image_path:
+            return
+        self.pending_image_path = path
+        self.pending_due = rollover.apply_due(self.apply_at)
+        log_msg(f"Prefetched {path.name}, applying at: {self.apply_at}")
+
+    def is_session_locked(self):
+        user32 = ctypes.windll.user32
+        hdesk = user32.OpenInputDesktop(0, False, 0x0100)  # DESKTOP_SWITCHDESKTOP
+        if not hdesk:
+            return True
+        try:
+            return not user32.SwitchDesktop(hdesk)
+        finally:
+            user32.CloseDesktop(hdesk)
+
+    def apply_pending(self):
+        unlocked = False
+        if self.apply_at == rollover.APPLY_ON_UNLOCK:
+            locked = self.is_session_locked()
+            unlocked = self.was_locked and not locked
+            self.was_locked = locked
+        
+        if not self.pending_image_path:
+            return
+        if self.pending_due is None:
+            if not unlocked:
+                return
+        elif time.time() < self.pending_due:
+            return
+        
+        path = self.pending_image_path
+        self.pending_image_path = None
+        self.set_wallpaper(path)
+        if self.root and self.root.winfo_viewable():
+            self.root.after(0, lambda: self.setup_ui(self.root))
+
+    def startup_check(self):
+        # Not a user action: respect apply_at instead of forcing the new image now
+        wallpaper = self.get_current_wallpaper()
+        if wallpaper and wallpaper.parent == IMAGE_DIR:
+            self.current_image_path = wallpaper
+        path = self.check_and_update(queue=True)
+        # Often offline right after logon: don't wait for the next rollover to retry
+        if not path and self.smart_schedule and self.next_rollover:
+            self.schedule_fetch(time.time() + rollover.RETRY_INTERVAL)
+
+    def check_and_update(self, force=False, queue=False):
+        path = None
         try:
             info = self.get_bing_image_info()
             if info:
-                url, date_str = info
+                url, date_str, fullstartdate, enddate = info
                 path = self.download_image(url, date_str)
                 if path:
-                    if force or self.current_image_path != path:
+                    if fullstartdate and fullstartdate != self.last_fullstartdate:
+                        self.learn_rollover(fullstartdate, date_str, enddate)
+                    if queue and self.current_image_path != path:
+                        self.queue_wallpaper(path)
+                    elif force or self.current_image_path != path:
+                        self.pending_image_path = None
                         self.set_wallpaper(path)
                     elif self.icon and self.icon.icon is None:
                         self.update_tray_icon(path)
@@ -279,14 +424,25 @@ class BingTrayApp:
             log_msg(f"Update Loop Error: {e}", "error")
         
         self.last_check = time.time()
+        return path
 
     def background_loop(self):
         while self.running:
             try:
+                if updater.restart_requested(DATA_DIR):
+                    log_msg("Update installed, exiting for restart")
+                    self.on_exit(self.icon, None)
+                    break
                 if self.check_interval > 0:
-                    elapsed = time.time() - self.last_check
-                    if elapsed > self.check_interval:
+                    now = time.time()
+                    if self.smart_schedule and self.next_rollover:
+                        if not self.prewarmed and now >= self.next_fetch - rollover.PREWARM_LEAD:
+                            self.prewarm_session()
+                        if now >= self.next_fetch:
+                            self.prefetch_next_image()
+                    elif now - self.last_check > self.check_interval:
                         self.check_and_update(force=False)
+                self.apply_pending()
                 time.sleep(5)
             except Exception:
                 time.sleep(60)
@@ -319,6 +475,7 @@ class BingTrayApp:
             item('Check Now', lambda i, it: threading.Thread(target=self.check_and_update, args=(True,)).start()),
             pystray.Menu.SEPARATOR,
             item('Interval', pystray.Menu(*sub_items)),
+            item('Smart Schedule', self.toggle_smart_schedule, checked=lambda i: self.smart_schedule),
             pystray.Menu.SEPARATOR,
             item('Exit', self.on_exit)
         )
@@ -328,7 +485,7 @@ class BingTrayApp:
 
     def on_exit(self, icon, item):
         self.running = False
-        icon.stop()
+        if icon: icon.stop()
         if self.root: self.root.quit()
 
     def show_preview_window(self):
@@ -414,9 +571,13 @@ class BingTrayApp:
         except Exception: pass
 
     def run(self):
+        # Drop any restart request left over from before this launch
+        updater.restart_requested(DATA_DIR)
+        updater.write_pid(DATA_DIR)
+        
         t = threading.Thread(target=self.background_loop, daemon=True)
         t.start()
-        threading.Thread(target=self.check_and_update, args=(True,), daemon=True).start()
+        threading.Thread(target=self.startup_check, daemon=True).start()
         
         try:
             icon_img = Image.new('RGB', (64, 64), color=(0, 120, 215))
@@ -427,6 +588,8 @@ class BingTrayApp:
             self.root.mainloop()
         except KeyboardInterrupt:
             self.running = False
+        finally:
+            updater.clear_pid(DATA_DIR)
 
 if __name__ == "__main__":
     app = BingTrayApp()
@@ -10,6 +10,10 @@ import urllib.request
 import re
 import json
 import subprocess
+import threading
+import queue
+
+import updater
 
 try:
     from _version import __version__ as VERSION
@@ -66,7 +70,8 @@ class SimpleInstaller(tk.Tk):
         btn_frame = ttk.Frame(self)
         btn_frame.pack(pady=20)
         
-        ttk.Button(btn_frame, text="Install / Update", command=self.install).pack(side=tk.LEFT, padx=5)
+        self.btn_install = ttk.Button(btn_frame, text="Install / Update", command=self.install)
+        self.btn_install.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Uninstall", command=self.uninstall).pack(side=tk.LEFT, padx=5)
         
         self.btn_open = ttk.Button(btn_frame, text="Open Folder", command=self.open_folder, state=tk.DISABLED)
@@ -84,7 +89,8 @@ class SimpleInstaller(tk.Tk):
         self.log_text.insert(tk.END, f"{msg}\n")
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
-        self.update()
+        # Redraw only; a full update() re-enters the event loop on every line
+        self.update_idletasks()
 
     def detect_proxy(self):
         self.log("Detecting proxy...")
@@ -159,11 +165,57 @@ class SimpleInstaller(tk.Tk):
                 self.log("Source file missing.")
                 return
 
-            # 2. File Copy
-            dst_exe = INSTALL_DIR / "BingWallpaper.exe"
-            self.log(f"Copying to {dst_exe}...")
-            shutil.copy2(src_exe, dst_exe)
+            # 2. File Update (off the UI thread; waiting for the app can take a while)
+            self.btn_install.config(state=tk.DISABLED)
+            events = queue.Queue()
+            threading.Thread(target=self.update_payload, args=(src_exe, events), daemon=True).start()
+            self.after(100, self.poll_update, events)
             
+        except Exception as e:
+            messagebox.showerror("Error", f"Install failed: {str(e)}")
+            self.log(f"Error: {str(e)}")
+
+    def update_payload(self, src_exe, events):
+        # Worker thread: never touch Tk here, report through the queue instead
+        try:
+            changed, digest = updater.needs_update(src_exe, INSTALL_DIR, VERSION)
+            app_pid = updater.running_app_pid(INSTALL_DIR)
+            if changed:
+                events.put(("log", "Staging new version..."))
+                if app_pid:
+                    events.put(("log", "Signalling running app to restart..."))
+                updater.apply_update(
+                    src_exe, INSTALL_DIR, VERSION, digest, pid=app_pid,
+                    on_timeout=lambda: os.system('taskkill /F /IM "BingWallpaper.exe" >nul 2>&1'))
+                events.put(("log", f"Swapped in {INSTALL_DIR / updater.PAYLOAD_NAME}"))
+            else:
+                events.put(("log", "Already up to date - skipping copy."))
+            events.put(("done", changed, app_pid is not None))
+        except Exception as e:
+            events.put(("error", e))
+
+    def poll_update(self, events):
+        try:
+            while True:
+                event = events.get_nowait()
+                if event[0] == "log":
+                    self.log(event[1])
+                elif event[0] == "done":
+                    self.finish_install(event[1], event[2])
+                    return
+                else:
+                    raise event[1]
+        except queue.Empty:
+            self.after(100, self.poll_update, events)
+        except Exception as e:
+            self.btn_install.config(state=tk.NORMAL)
+            messagebox.showerror("Error", f"Install failed: {str(e)}")
+            self.log(f"Error: {str(e)}")
+
+    def finish_install(self, changed, app_running):
+        self.btn_install.config(state=tk.NORMAL)
+        try:
+            dst_exe = INSTALL_DIR / updater.PAYLOAD_NAME
             if not dst_exe.exists():
                 raise Exception("Copy failed - File not found at destination.")
 
@@ -178,20 +230,23 @@ class SimpleInstaller(tk.Tk):
                 with open(config_path, 'w') as f:
                     json.dump(config_data, f, indent=2)
 
-            # 4. Shortcuts (Using subprocess for safety)
+            # 4. Shortcuts (one batched PowerShell call)
+            folders = []
             if self.desktop_var.get():
-                self.create_shortcut(dst_exe, "Bing Wallpaper", "Desktop")
-            
+                folders.append("Desktop")
             if self.startup_var.get():
-                self.create_shortcut(dst_exe, "Bing Wallpaper", "Startup")
+                folders.append("Startup")
+            if folders:
+                self.create_shortcuts(dst_exe, "Bing Wallpaper", folders)
             
             # 5. Success State
             self.log("Installation Successful!")
             self.btn_open.config(state=tk.NORMAL)
             
-            # Launch
-            self.log("Launching app...")
-            os.startfile(dst_exe)
+            # Launch (a running, unchanged app is left alone)
+            if changed or not app_running:
+                self.log("Launching app...")
+                os.startfile(dst_exe)
             
             messagebox.showinfo("Success", "Installation Complete!")
             
@@ -199,31 +254,27 @@ class SimpleInstaller(tk.Tk):
             messagebox.showerror("Error", f"Install failed: {str(e)}")
             self.log(f"Error: {str(e)}")
 
-    def create_shortcut(self, target, name, folder):
+    def create_shortcuts(self, target, name, folders):
         try:
-            if folder == "Startup":
-                link_dir = Path(os.getenv("APPDATA")) / "Microsoft" / "Windows" / "Start Menu" / "Programs" / "Startup"
-            else:
-                link_dir = Path(os.environ["USERPROFILE"]) / "Desktop"
-            
-            link_dir.mkdir(parents=True, exist_ok=True)
-            link_path = link_dir / f"{name}.lnk"
+            shortcuts = []
+            for folder in folders:
+                if folder == "Startup":
+                    link_dir = Path(os.getenv("APPDATA")) / "Microsoft" / "Windows" / "Start Menu" / "Programs" / "Startup"
+                else:
+                    link_dir = Path(os.environ["USERPROFILE"]) / "Desktop"
+                
+                link_dir.mkdir(parents=True, exist_ok=True)
+                shortcuts.append((link_dir / f"{name}.lnk", target))
             
-            self.log(f"Creating {folder} shortcut...")
+            self.log(f"Creating shortcuts ({', '.join(folders)})...")
             
-            # Safe PowerShell command using Subprocess
-            ps_script = f"""
-            $ws = New-Object -ComObject WScript.Shell
-            $s = $ws.CreateShortcut('{str(link_path)}')
-            $s.TargetPath = '{str(target)}'
-            $s.WorkingDirectory = '{str(INSTALL_DIR)}'
-            $s.Save()
-            """
+            # Safe PowerShell command using Subprocess, single process for all links
+            ps_script = updater.build_shortcut_script(shortcuts, INSTALL_DIR)
             
             subprocess.run(["powershell", "-Command", ps_script], check=True, capture_output=True, creationflags=subprocess.CREATE_NO_WINDOW)
             
         except Exception as e:
-            self.log(f"Shortcut Error ({folder}): {e}")
+            self.log(f"Shortcut Error ({', '.join(folders)}): {e}")
 
     def uninstall(self):
         try:
@@ -0,0 +1,89 @@
+# rollover.py
+# Predicts when Bing publishes the next daily image, from the API's own dates.
+# Bing's fullstartdate is the UTC publish moment (e.g. 202610180700), while
+# startdate/enddate are market-local days. The image is replaced after
+# (enddate - startdate) days, at the same UTC time; for markets east of UTC
+# fullstartdate falls on the day before startdate, so enddate alone is a day late.
+import datetime
+
+UTC = datetime.timezone.utc
+
+PREWARM_LEAD = 60          # seconds before each fetch to open DNS/TLS
+FETCH_DELAY = 120          # seconds after rollover before the first fetch
+RETRY_INTERVAL = 600       # seconds between fetches while not yet published
+RETRY_WINDOW = 3 * 3600    # seconds after rollover to keep retrying quickly
+
+APPLY_IMMEDIATE = "immediate"
+APPLY_ON_UNLOCK = "unlock"
+
+
+def parse_fullstartdate(fullstartdate):
+    return datetime.datetime.strptime(fullstartdate, "%Y%m%d%H%M").replace(tzinfo=UTC)
+
+
+def rollover_time(fullstartdate):
+    """Learned publish time of day as 'HH:MM' UTC."""
+    return parse_fullstartdate(fullstartdate).strftime("%H:%M")
+
+
+def next_rollover(fullstartdate, startdate, enddate):
+    start_day = datetime.datetime.strptime(startdate, "%Y%m%d")
+    end_day = datetime.datetime.strptime(enddate, "%Y%m%d")
+    return parse_fullstartdate(fullstartdate) + (end_day - start_day)
+
+
+def next_rollover_from_time(rollover_utc, now=None):
+    """Next occurrence of a learned 'HH:MM' UTC rollover after now."""
+    now = now or datetime.datetime.now(UTC)
+    hour, minute = (int(p) for p in rollover_utc.split(":"))
+    candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += datetime.timedelta(days=1)
+    return candidate
+
+
+def retry_delay(rollover_ts, now_ts, fallback):
+    # Shortly after rollover poll quickly (DST shifts publish by an hour),
+    # then back off to the regular interval.
+    if now_ts < rollover_ts + RETRY_WINDOW:
+        return RETRY_INTERVAL
+    return max(fallback, RETRY_INTERVAL)
+
+
+def parse_apply_time(apply_at):
+    """(hour, minute) for a local 'HH:MM' apply_at, or None if it isn't one."""
+    if not isinstance(apply_at, str):
+        return None
+    try:
+        hour, minute = (int(p) for p in apply_at.split(":"))
+        datetime.time(hour, minute)
+    except ValueError:
+        return None
+    return hour, minute
+
+
+def normalize_apply_at(apply_at):
+    if apply_at in (APPLY_IMMEDIATE, APPLY_ON_UNLOCK) or parse_apply_time(apply_at):
+        return apply_at
+    return APPLY_IMMEDIATE
+
+
+def apply_due(apply_at, fetched_at=None):
+    """Epoch seconds when a prefetched image should be applied.
+
+    apply_at is 'immediate', 'unlock' (returns None, caller waits for an
+    unlock) or a local 'HH:MM' such as the start of the workday. An image
+    fetched after that time of day waits for the next occurrence.
+    """
+    fetched_at = fetched_at or datetime.datetime.now()
+    if not apply_at or apply_at == APPLY_IMMEDIATE:
+        return fetched_at.timestamp()
+    if apply_at == APPLY_ON_UNLOCK:
+        return None
+    parsed = parse_apply_time(apply_at)
+    if not parsed:
+        return fetched_at.timestamp()
+    due = fetched_at.replace(hour=parsed[0], minute=parsed[1], second=0, microsecond=0)
+    if due < fetched_at:
+        due += datetime.timedelta(days=1)
+    return due.timestamp()
@@ -0,0 +1,76 @@
+# test_rollover.py
+import datetime
+
+import pytest
+
+import rollover
+
+UTC = rollover.UTC
+
+
+def test_en_us_payload():
+    # en-US publishes at local midnight PDT = 07:00 UTC on startdate
+    assert rollover.rollover_time("202610180700") == "07:00"
+    assert rollover.next_rollover("202610180700", "20261018", "20261019") == \
+        datetime.datetime(2026, 10, 19, 7, 0, tzinfo=UTC)
+
+
+def test_market_east_of_utc():
+    # ja-JP: fullstartdate falls on the UTC day before startdate
+    assert rollover.next_rollover("202610181500", "20261019", "20261020") == \
+        datetime.datetime(2026, 10, 19, 15, 0, tzinfo=UTC)
+
+
+@pytest.mark.parametrize("enddate", [None, "", "2026-10-19", "notadate"])
+def test_missing_or_malformed_enddate(enddate):
+    with pytest.raises((TypeError, ValueError)):
+        rollover.next_rollover("202610180700", "20261018", enddate)
+
+
+def test_next_rollover_from_learned_time():
+    before = datetime.datetime(2026, 10, 18, 6, 0, tzinfo=UTC)
+    after = datetime.datetime(2026, 10, 18, 9, 0, tzinfo=UTC)
+    assert rollover.next_rollover_from_time("07:00", before) == \
+        datetime.datetime(2026, 10, 18, 7, 0, tzinfo=UTC)
+    assert rollover.next_rollover_from_time("07:00", after) == \
+        datetime.datetime(2026, 10, 19, 7, 0, tzinfo=UTC)
+
+
+def test_retry_window_then_fallback_interval():
+    rolled = 1_000_000
+    assert rollover.retry_delay(rolled, rolled + 60, 43200) == rollover.RETRY_INTERVAL
+    late = rolled + rollover.RETRY_WINDOW
+    assert rollover.retry_delay(rolled, late, 43200) == 43200
+    # A tiny custom interval never polls faster than the retry interval
+    assert rollover.retry_delay(rolled, late, 60) == rollover.RETRY_INTERVAL
+
+
+FETCHED = datetime.datetime(2026, 10, 18, 15, 2)
+
+
+def test_apply_immediate():
+    assert rollover.apply_due("immediate", FETCHED) == FETCHED.timestamp()
+
+
+def test_apply_on_unlock():
+    assert rollover.apply_due("unlock", FETCHED) is None
+
+
+def test_apply_later_today():
+    early = datetime.datetime(2026, 10, 18, 0, 2)
+    assert rollover.apply_due("08:30", early) == datetime.datetime(2026, 10, 18, 8, 30).timestamp()
+
+
+def test_apply_time_already_passed_rolls_to_tomorrow():
+    assert rollover.apply_due("08:30", FETCHED) == datetime.datetime(2026, 10, 19, 8, 30).timestamp()
+
+
+@pytest.mark.parametrize("value", [830, "8.30", "25:00", "morning", None, ""])
+def test_malformed_apply_at(value):
+    assert rollover.normalize_apply_at(value) == rollover.APPLY_IMMEDIATE
+    assert rollover.apply_due(value, FETCHED) == FETCHED.timestamp()
+
+
+@pytest.mark.parametrize("value", ["immediate", "unlock", "08:30"])
+def test_valid_apply_at_is_kept(value):
+    assert rollover.normalize_apply_at(value) == value
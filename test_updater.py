@@ -0,0 +1,167 @@
+# test_updater.py
+# Runs on any OS: the PowerShell and taskkill steps are faked.
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+import updater
+
+
+@pytest.fixture
+def install_dir(tmp_path):
+    d = tmp_path / "install"
+    d.mkdir()
+    return d
+
+
+@pytest.fixture
+def src(tmp_path):
+    p = tmp_path / "BingWallpaper.exe"
+    p.write_bytes(os.urandom(256 * 1024))
+    return p
+
+
+@pytest.fixture
+def any_image(monkeypatch):
+    # The test runner is python, not BingWallpaper.exe; only check liveness
+    real = updater.process_alive
+    monkeypatch.setattr(updater, "process_alive", lambda pid, image_name=None: real(pid, image_name=None))
+
+
+def install(src, install_dir, version="1.0"):
+    changed, digest = updater.needs_update(src, install_dir, version)
+    updater.apply_update(src, install_dir, version, digest)
+    return digest
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_fresh_install_needs_update(src, install_dir):
+    changed, digest = updater.needs_update(src, install_dir, "1.0")
+    assert changed
+    assert digest == updater.file_hash(src)
+
+
+def test_identical_payload_is_skipped(src, install_dir):
+    install(src, install_dir)
+    assert updater.needs_update(src, install_dir, "1.0") == (False, updater.file_hash(src))
+
+
+def test_version_or_content_change_triggers_update(src, install_dir):
+    install(src, install_dir)
+    assert updater.needs_update(src, install_dir, "1.1")[0]
+    src.write_bytes(b"new build")
+    assert updater.needs_update(src, install_dir, "1.0")[0]
+
+
+def test_manifest_trusted_while_size_and_mtime_match(src, install_dir):
+    install(src, install_dir)
+    manifest = updater.read_manifest(install_dir)
+    manifest["sha256"] = "from-manifest"
+    (install_dir / updater.MANIFEST_NAME).write_text(json.dumps(manifest))
+    assert updater.installed_hash(install_dir) == "from-manifest"
+
+    dst = install_dir / updater.PAYLOAD_NAME
+    os.utime(dst, ns=(manifest["mtime_ns"] + 10**9, manifest["mtime_ns"] + 10**9))
+    assert updater.installed_hash(install_dir) == updater.file_hash(dst)
+
+
+def test_staged_hash_mismatch_is_removed(src, install_dir):
+    with pytest.raises(IOError):
+        updater.stage_payload(src, install_dir, "0" * 64)
+    assert not (install_dir / (updater.PAYLOAD_NAME + ".new")).exists()
+
+
+def test_failed_swap_discards_staged(src, install_dir, monkeypatch):
+    def locked(*args):
+        raise PermissionError("in use")
+    monkeypatch.setattr(updater.os, "replace", locked)
+    monkeypatch.setattr(updater.time, "sleep", lambda s: None)
+    changed, digest = updater.needs_update(src, install_dir, "1.0")
+    with pytest.raises(PermissionError):
+        updater.apply_update(src, install_dir, "1.0", digest)
+    assert not (install_dir / (updater.PAYLOAD_NAME + ".new")).exists()
+    assert not (install_dir / updater.PAYLOAD_NAME).exists()
+
+
+def test_swap_retries_while_exe_is_locked(src, install_dir, monkeypatch):
+    real_replace = os.replace
+    failures = []
+
+    def flaky(a, b):
+        if len(failures) < 2:
+            failures.append(a)
+            raise PermissionError("sharing violation")
+        real_replace(a, b)
+    monkeypatch.setattr(updater.os, "replace", flaky)
+    monkeypatch.setattr(updater.time, "sleep", lambda s: None)
+    staged = updater.stage_payload(src, install_dir, updater.file_hash(src))
+    dst = updater.swap_payload(staged, install_dir)
+    assert len(failures) == 2
+    assert updater.file_hash(dst) == updater.file_hash(src)
+
+
+def test_stale_pid_file_is_not_running(install_dir):
+    (install_dir / updater.PID_NAME).write_text(str(dead_pid()))
+    assert not updater.is_app_running(install_dir)
+    assert not (install_dir / updater.PID_NAME).exists()
+
+
+def test_live_pid_is_running(install_dir, any_image):
+    updater.write_pid(install_dir)
+    assert updater.running_app_pid(install_dir) == os.getpid()
+    updater.clear_pid(install_dir)
+    assert not (install_dir / updater.PID_NAME).exists()
+
+
+def test_request_shutdown_waits_for_process_exit(install_dir):
+    assert updater.request_shutdown(install_dir, dead_pid(), timeout=1, poll=0.01)
+    assert not (install_dir / updater.RESTART_FLAG_NAME).exists()
+
+
+def test_request_shutdown_times_out(install_dir, any_image):
+    assert not updater.request_shutdown(install_dir, os.getpid(), timeout=0.05, poll=0.01)
+    assert not (install_dir / updater.RESTART_FLAG_NAME).exists()
+
+
+def test_apply_update_kills_app_that_ignores_restart(src, install_dir, any_image):
+    killed = []
+    changed, digest = updater.needs_update(src, install_dir, "1.0")
+    updater.apply_update(src, install_dir, "1.0", digest, pid=os.getpid(),
+                         on_timeout=lambda: killed.append(True), timeout=0.05)
+    assert killed == [True]
+    assert not updater.needs_update(src, install_dir, "1.0")[0]
+
+
+def test_apply_update_kills_untracked_app_holding_exe(src, install_dir, monkeypatch):
+    # An app from before app.pid existed: no pid, exe locked until killed
+    real_replace = os.replace
+    killed = []
+
+    def locked_until_killed(a, b):
+        if not killed:
+            raise PermissionError("in use")
+        real_replace(a, b)
+    monkeypatch.setattr(updater.os, "replace", locked_until_killed)
+    changed, digest = updater.needs_update(src, install_dir, "1.0")
+    updater.apply_update(src, install_dir, "1.0", digest, pid=None,
+                         on_timeout=lambda: killed.append(True))
+    assert killed == [True]
+    assert updater.file_hash(install_dir / updater.PAYLOAD_NAME) == digest
+
+
+def test_shortcut_script_is_one_batch_and_quoted():
+    script = updater.build_shortcut_script(
+        [(r"C:\Users\O'Neil\Desktop\Bing Wallpaper.lnk", r"C:\App\BingWallpaper.exe"),
+         (r"C:\Startup\Bing Wallpaper.lnk", r"C:\App\BingWallpaper.exe")],
+        r"C:\App")
+    assert script.count("New-Object -ComObject WScript.Shell") == 1
+    assert script.count("$s.Save()") == 2
+    assert r"'C:\Users\O''Neil\Desktop\Bing Wallpaper.lnk'" in script
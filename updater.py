@@ -0,0 +1,259 @@
+# updater.py
+# Platform-neutral install/update helpers shared by the installer and the app.
+# Nothing here touches winreg, tkinter or PowerShell so it can run on any OS.
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+from pathlib import Path
+
+PAYLOAD_NAME = "BingWallpaper.exe"
+MANIFEST_NAME = "install.json"
+PID_NAME = "app.pid"
+RESTART_FLAG_NAME = "restart.flag"
+
+CHUNK_SIZE = 1024 * 1024
+
+SWAP_ATTEMPTS = 8
+SWAP_DELAY = 0.25          # seconds, doubled after every failed swap attempt
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(install_dir):
+    try:
+        with open(Path(install_dir) / MANIFEST_NAME, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def write_manifest(install_dir, version, digest):
+    dst = Path(install_dir) / PAYLOAD_NAME
+    st = dst.stat()
+    manifest = {
+        "version": version,
+        "sha256": digest,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+    tmp_path = Path(install_dir) / (MANIFEST_NAME + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, Path(install_dir) / MANIFEST_NAME)
+    return manifest
+
+
+def installed_hash(install_dir):
+    """Hash of the installed payload, trusting the manifest while the file is untouched."""
+    dst = Path(install_dir) / PAYLOAD_NAME
+    if not dst.exists():
+        return None
+    manifest = read_manifest(install_dir)
+    st = dst.stat()
+    if (manifest.get("sha256")
+            and manifest.get("size") == st.st_size
+            and manifest.get("mtime_ns") == st.st_mtime_ns):
+        return manifest["sha256"]
+    return file_hash(dst)
+
+
+def needs_update(src, install_dir, version):
+    """Return (changed, src_digest) for the payload at src against install_dir."""
+    src_digest = file_hash(src)
+    manifest = read_manifest(install_dir)
+    if manifest.get("version") != version:
+        return True, src_digest
+    return installed_hash(install_dir) != src_digest, src_digest
+
+
+def stage_payload(src, install_dir, digest):
+    # Staged next to the target so the final swap is a same-volume rename
+    staged = Path(install_dir) / (PAYLOAD_NAME + ".new")
+    shutil.copy2(src, staged)
+    if file_hash(staged) != digest:
+        staged.unlink()
+        raise IOError("Staged payload hash mismatch.")
+    return staged
+
+
+def swap_payload(staged, install_dir, attempts=SWAP_ATTEMPTS, delay=SWAP_DELAY):
+    # The --onefile bootloader keeps the exe open until its child has exited
+    # and cleaned up _MEI, so a sharing violation right after shutdown is expected.
+    dst = Path(install_dir) / PAYLOAD_NAME
+    for attempt in range(attempts):
+        try:
+            os.replace(staged, dst)
+            return dst
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+
+def discard_staged(install_dir):
+    staged = Path(install_dir) / (PAYLOAD_NAME + ".new")
+    if staged.exists():
+        staged.unlink()
+
+
+# --- Running app coordination (pid file + restart flag) ---
+
+def write_pid(install_dir):
+    pid_path = Path(install_dir) / PID_NAME
+    pid_path.write_text(str(os.getpid()))
+
+
+def clear_pid(install_dir):
+    pid_path = Path(install_dir) / PID_NAME
+    try:
+        # A restarted instance may already own the file
+        if pid_path.read_text().strip() == str(os.getpid()):
+            pid_path.unlink()
+    except Exception:
+        pass
+
+
+def read_pid(install_dir):
+    try:
+        return int((Path(install_dir) / PID_NAME).read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def process_alive(pid, image_name=PAYLOAD_NAME):
+    """True if pid is a live process (on Windows, one running image_name)."""
+    if not pid:
+        return False
+    if sys.platform == "win32":
+        return _win_process_alive(pid, image_name)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _win_process_alive(pid, image_name):
+    import ctypes
+    from ctypes import wintypes
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    STILL_ACTIVE = 259
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return False
+    try:
+        code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)) or code.value != STILL_ACTIVE:
+            return False
+        if image_name:
+            buf = ctypes.create_unicode_buffer(32768)
+            size = wintypes.DWORD(len(buf))
+            if not kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+                return False
+            return Path(buf.value).name.lower() == image_name.lower()
+        return True
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def running_app_pid(install_dir):
+    """Pid of the installed app if it is really running; clears a stale pid file."""
+    pid = read_pid(install_dir)
+    if process_alive(pid):
+        return pid
+    pid_path = Path(install_dir) / PID_NAME
+    if pid_path.exists():
+        try:
+            pid_path.unlink()
+        except OSError:
+            pass
+    return None
+
+
+def is_app_running(install_dir):
+    return running_app_pid(install_dir) is not None
+
+
+def restart_requested(install_dir):
+    flag = Path(install_dir) / RESTART_FLAG_NAME
+    if flag.exists():
+        try:
+            flag.unlink()
+        except Exception:
+            pass
+        return True
+    return False
+
+
+def request_shutdown(install_dir, pid, timeout=15, poll=0.5):
+    """Ask the app to exit and wait for its process to end. Blocks; keep off the UI thread."""
+    flag = Path(install_dir) / RESTART_FLAG_NAME
+    flag.write_text("restart")
+    try:
+        deadline = time.monotonic() + timeout
+        while process_alive(pid):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+    finally:
+        # Never leave the flag behind for the next launch to trip over
+        if flag.exists():
+            flag.unlink()
+
+
+def apply_update(src, install_dir, version, digest, pid=None, on_timeout=None, timeout=15):
+    """Stage src, stop the running app (pid), swap the payload in and record the manifest.
+
+    on_timeout is called if the app does not exit in time (e.g. to force-kill it),
+    or if the exe is locked although no pid was known: releases from before
+    app.pid existed never answer the restart flag.
+    """
+    staged = stage_payload(src, install_dir, digest)
+    try:
+        if pid and not request_shutdown(install_dir, pid, timeout=timeout):
+            if on_timeout:
+                on_timeout()
+        if pid or not on_timeout:
+            dst = swap_payload(staged, install_dir)
+        else:
+            try:
+                dst = swap_payload(staged, install_dir, attempts=1)
+            except PermissionError:
+                on_timeout()
+                dst = swap_payload(staged, install_dir)
+    except Exception:
+        discard_staged(install_dir)
+        raise
+    write_manifest(install_dir, version, digest)
+    return dst
+
+
+# --- Shortcuts ---
+
+def _ps_quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def build_shortcut_script(shortcuts, working_dir):
+    """One PowerShell script creating every (link_path, target) shortcut in a single process."""
+    lines = ["$ws = New-Object -ComObject WScript.Shell"]
+    for link_path, target in shortcuts:
+        lines.append(f"$s = $ws.CreateShortcut({_ps_quote(link_path)})")
+        lines.append(f"$s.TargetPath = {_ps_quote(target)}")
+        lines.append(f"$s.WorkingDirectory = {_ps_quote(working_dir)}")
+        lines.append("$s.Save()")
+    return "\n".join(lines)